@@ -1,7 +1,13 @@
+import pandas as pd
 import streamlit as st
 from pl0_lexer import Lexer
 from pl0_parser import SLRParser
 
+
+# 进程启动时预先构建 SLR 分析表，首次点击编译时无需再等待。
+# 分析表由 SLRParser 在进程内缓存，所有会话共享同一份
+SLRParser.warm_tables()
+
 # ==========================================
 # 1. 页面配置与侧边栏 (保持原样)
 # ==========================================
@@ -39,8 +45,77 @@ with st.sidebar:
     """)
 
 # ==========================================
-# 2. 主页面布局
+# 2. 编译管线 (按源码缓存)
+# ==========================================
+
+@st.cache_data(max_entries=32, ttl="10m")
+def compile_pipeline(code: str):
+    """
+    执行 词法分析 -> 语法分析 的完整管线。
+    Streamlit 每次交互都会重跑整个脚本，源码未变时直接命中缓存。
+    :return: (tokens, 词法错误列表, 语法错误信息或 None)
+             异常对象不便缓存，语法错误以字符串形式返回
+    """
+    lexer = Lexer(code)
+    lexer.tokenize()
+    if lexer.has_error():
+        return None, list(lexer.errors), None
+
+    tokens = lexer.get_tokens()
+    try:
+        SLRParser(tokens).parse()
+    except SyntaxError as se:
+        return tokens, [], str(se)
+    return tokens, [], None
+
+# ==========================================
+# 3. 输出标签页
 # ==========================================
+# Token 标签页是独立的 fragment，页内的 Parse Only 按钮只重跑本页，
+# 不会触发整个脚本重新执行；其余标签页没有控件，直接渲染
+
+@st.fragment
+def render_token_tab():
+    st.caption("将源代码分解为 Token 流：")
+    if 'tokens' in st.session_state:
+        st.dataframe(st.session_state['token_df'], use_container_width=True)
+
+        # 把“语法解析（Parse Only）”按钮放在词法展示之后
+        if st.button("🔍 语法解析 (Parse Only)", key="parse_in_tab"):
+            try:
+                tokens = st.session_state['tokens']
+                parser = SLRParser(tokens)
+                parser.parse()
+                st.success("✅ 语法检查通过（符合文法）")
+            except SyntaxError as se:
+                st.error(f"❌ {se}")
+            except Exception as e:
+                st.error(f"❌ 解析失败: {e}")
+
+    else:
+        st.info("请点击左侧按钮开始编译...")
+
+def render_pcode_tab():
+    st.caption("生成的栈式计算机指令 (P-Code)：")
+    if 'p_code' in st.session_state:
+        # 简单展示
+        st.code(st.session_state['p_code_text'])
+    else:
+        st.info("编译成功后将在此处显示目标代码...")
+
+def render_output_tab():
+    st.caption("虚拟机的控制台输出结果：")
+    if 'result' in st.session_state:
+        st.code(st.session_state['result'], language="text")
+    else:
+        st.info("等待运行...")
+
+# ==========================================
+# 4. 主页面布局
+# ==========================================
+
+# 词法错误最多展示的条数
+MAX_SHOWN_ERRORS = 50
 
 st.title("🛠️ PL/0 编译器在线演示系统")
 st.markdown("### 从源码到运行结果的完整可视化")
@@ -79,30 +154,40 @@ with col1:
         if 'p_code' in st.session_state: del st.session_state['p_code']
 
         try:
-            # 1. 词法分析
-            lexer = Lexer(code_input)
-            
+            # 1. 词法分析 + 语法分析 (结果按源码缓存)
+            tokens, lex_errors, syntax_error = compile_pipeline(code_input)
+
             # 先检查词法错误
-            lexer.tokenize() 
-            if lexer.has_error():
-                st.error("❌ 词法分析失败 (Lexical Error)")
-                for err in lexer.errors:
-                    st.error(err)
+            if lex_errors:
+                # 所有错误合并到一个组件中，避免逐条产生前端增量
+                shown = lex_errors[:MAX_SHOWN_ERRORS]
+                if len(lex_errors) > MAX_SHOWN_ERRORS:
+                    shown.append(f"... (另有 {len(lex_errors) - MAX_SHOWN_ERRORS} 条错误未显示)")
+                st.error("❌ 词法分析失败 (Lexical Error)\n\n" + "\n\n".join(f"- {e}" for e in shown))
             else:
                 # 获取格式化后的 Tokens (带行号)
-                tokens = lexer.get_tokens()
                 st.session_state['tokens'] = tokens
-                
+                # Token 表格只在编译时构建一次，标签页重绘时直接复用
+                # Lexer 输出格式固定为 (类型, 值, 行号)，无需逐个探测；
+                # 指定紧凑的列类型，避免每次渲染时推断 schema
+                st.session_state['token_df'] = pd.DataFrame({
+                    "行": pd.Series([t[2] for t in tokens], dtype="int32"),
+                    "Token 类型": pd.Categorical([t[0] for t in tokens]),
+                    "Token 值": pd.Series([t[1] for t in tokens], dtype="object"),
+                })
+
                 # 2. 语法分析
                 # 注意：当前的 SLRParser 仅做语法校验，暂不生成 P-Code
-                parser = SLRParser(tokens)
-                parser.parse()
-                
+                if syntax_error:
+                    raise SyntaxError(syntax_error)
+
                 st.success("✅ 编译成功！(语法分析通过)")
                 
                 # 由于我们目前只实现了 SLR 校验器，没有提供 CodeGen/VM 模块，
                 # 这里做一个友好的提示，保持界面不崩溃。
                 st.session_state['p_code'] = ["(当前版本仅支持语法检查，无目标代码生成)"]
+                # 目标代码文本同样只在编译时拼接一次
+                st.session_state['p_code_text'] = "\n".join(str(x) for x in st.session_state['p_code'])
                 st.session_state['result'] = "Syntax Check Passed."
             
         except SyntaxError as se:
@@ -117,48 +202,13 @@ with col2:
     tab1, tab2, tab3 = st.tabs(["🔤 词法分析 (Tokens)", "⚙️ 目标代码 (P-Code)", "🖥️ 运行结果 (Output)"])
     
     with tab1:
-        st.caption("将源代码分解为 Token 流：")
-        if 'tokens' in st.session_state:
-            tokens = st.session_state['tokens']
-            rows = []
-            # 解析 tokens (Type, Value, Line)
-            for t in tokens:
-                # 兼容 Lexer 返回的三元组
-                if isinstance(t, tuple) and len(t) >= 3:
-                    t_type, t_val, t_line = t[0], t[1], t[2]
-                    rows.append({"行": t_line, "Token 类型": t_type, "Token 值": t_val})
-            
-            st.dataframe(rows, use_container_width=True)
-
-            # 把“语法解析（Parse Only）”按钮放在词法展示之后
-            if st.button("🔍 语法解析 (Parse Only)", key="parse_in_tab"):
-                try:
-                    tokens = st.session_state['tokens']
-                    parser = SLRParser(tokens)
-                    parser.parse()
-                    st.success("✅ 语法检查通过（符合文法）")
-                except SyntaxError as se:
-                    st.error(f"❌ {se}")
-                except Exception as e:
-                    st.error(f"❌ 解析失败: {e}")
-
-        else:
-            st.info("请点击左侧按钮开始编译...")
+        render_token_tab()
     
     with tab2:
-        st.caption("生成的栈式计算机指令 (P-Code)：")
-        if 'p_code' in st.session_state:
-            # 简单展示
-            st.code("\n".join(str(x) for x in st.session_state['p_code']))
-        else:
-            st.info("编译成功后将在此处显示目标代码...")
+        render_pcode_tab()
             
     with tab3:
-        st.caption("虚拟机的控制台输出结果：")
-        if 'result' in st.session_state:
-            st.code(st.session_state['result'], language="text")
-        else:
-            st.info("等待运行...")
+        render_output_tab()
 
 # --- 页脚 ---
 st.markdown("---")
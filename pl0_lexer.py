@@ -1,5 +1,7 @@
 import re
-from typing import List, NamedTuple
+import sys
+from bisect import bisect_right
+from typing import List
 
 # ==========================================
 # 1. 配置与常量定义
@@ -8,18 +10,58 @@ from typing import List, NamedTuple
 # PL/0 虚拟机通常基于栈，限制整数为 32 位有符号整数
 MAX_INT = 2147483647 
 
-class Token(NamedTuple):
-    type: str       # Token 类型 (如 BEGIN, ID, NUMBER)
-    value: str      # Token 的实际文本值
-    line: int       # 行号
-    column: int     # 列号
+class Token:
+    __slots__ = ('type', 'value', 'line', 'column')
+
+    def __init__(self, type: str, value: str, line: int, column: int):
+        self.type = type        # Token 类型 (如 BEGIN, ID, NUMBER)
+        self.value = value      # Token 的实际文本值
+        self.line = line        # 行号
+        self.column = column    # 列号
+
+    def __repr__(self):
+        return f"Token(type={self.type!r}, value={self.value!r}, line={self.line}, column={self.column})"
 
 # 关键字集合 (全部大写，用于忽略大小写匹配)
-KEYWORDS = {
+KEYWORDS = frozenset({
     'BEGIN', 'CALL', 'CONST', 'DO', 'END', 'IF', 'ODD',
     'PROCEDURE', 'READ', 'THEN', 'VAR', 'WHILE', 'WRITE'
+})
+
+# 小写关键字 -> Token 类型，标识符按原文直接查表，无需每次 upper()
+KEYWORD_TYPES = {k.lower(): k for k in KEYWORDS}
+
+# 单字符运算符与界符 -> Token 类型
+SINGLE_CHAR_TOKENS = {
+    '+': 'PLUS', '-': 'MINUS', '*': 'TIMES', '/': 'SLASH',
+    ')': 'RPAREN', '=': 'EQ', '#': 'NE',
+    ',': 'COMMA', '.': 'PERIOD', ';': 'SEMICOLON',
 }
 
+# 语法分析器中统一记为 ('SYMBOL', 值, 行号) 的运算符与界符
+_SYMBOL_TYPES = frozenset({
+    'EQ', 'NE', 'LT', 'GT', 'LE', 'GE', 'PLUS', 'MINUS', 'TIMES', 'SLASH',
+    'LPAREN', 'RPAREN', 'COMMA', 'PERIOD', 'SEMICOLON',
+})
+
+# 变长 Token 的正则，配合 match(src, pos) 使用，避免切片复制剩余源码
+_ID_RE = re.compile(r'[A-Za-z][A-Za-z0-9]*')   # 标识符
+_NUM_RE = re.compile(r'\d+')                    # 数字
+_SKIP_RE = re.compile(r'[ \t\r\n]+')            # 空白符(空格、制表符、换行)
+
+# 标识符驻留表：直接映射 (无链)，大小为 2 的幂
+_INTERN_SIZE = 2048
+_INTERN_MASK = _INTERN_SIZE - 1
+
+def _intern_slot(value: str) -> int:
+    return (ord(value[0]) * 131 ^ ord(value[-1]) * 17 ^ len(value)) & _INTERN_MASK
+
+# 预先放入小写关键字，每次 tokenize 复制一份作为初始表
+_INTERN_SEED = [None] * _INTERN_SIZE
+for _kw in (sys.intern(k.lower()) for k in KEYWORDS):
+    _INTERN_SEED[_intern_slot(_kw)] = _kw
+del _kw
+
 # ==========================================
 # 2. 词法分析器核心类
 # ==========================================
@@ -29,90 +71,138 @@ class Lexer:
         self.source = source_code
         self.tokens: List[Token] = []
         self.errors: List[str] = []  # 存储词法错误信息
-        self.regex = self._compile_regex()
-        
-    def _compile_regex(self):
-        """编译正则表达式规则，注意顺序很重要"""
-        token_spec = [
-            ('COMMENT',  r'\(\*.*?\*\)'),   # 注释 (* ... *)，非贪婪匹配
-            ('ASSIGN',   r':='),            # 赋值符号 := (必须在冒号前)
-            ('LE',       r'<='),            # 小于等于 <= (必须在小于号前)
-            ('GE',       r'>='),            # 大于等于 >= (必须在大于号前)
-            ('NUMBER',   r'\d+'),           # 数字
-            ('ID',       r'[A-Za-z][A-Za-z0-9]*'), # 标识符
-            ('NEWLINE',  r'\n'),            # 换行符
-            ('SKIP',     r'[ \t\r]+'),      # 空白符(空格、制表符)
-            ('PLUS',     r'\+'),            # 加号
-            ('MINUS',    r'-'),             # 减号
-            ('TIMES',    r'\*'),            # 乘号
-            ('SLASH',    r'/'),             # 除号
-            ('LPAREN',   r'\('),            # 左括号
-            ('RPAREN',   r'\)'),            # 右括号
-            ('EQ',       r'='),             # 等号
-            ('NE',       r'#'),             # 不等于
-            ('LT',       r'<'),             # 小于
-            ('GT',       r'>'),             # 大于
-            ('COMMA',    r','),             # 逗号
-            ('PERIOD',   r'\.'),            # 句号
-            ('SEMICOLON', r';'),            # 分号
-            ('MISMATCH', r'.'),             # 兜底匹配：任何未被识别的字符
-        ]
-        # 使用 DOTALL 模式以便 . 能匹配换行(主要用于多行注释)
-        tok_regex = '|'.join('(?P<%s>%s)' % pair for pair in token_spec)
-        return re.compile(tok_regex, re.DOTALL)
+        self._parser_tokens: List[tuple] = []  # Parser 需要的 (类型, 值, 行号)
+        self._intern: List[str] = []
+        self._line_starts: List[int] = []
+        # 构造时不做任何扫描，词法分析推迟到 tokenize/get_tokens 真正需要时
 
     def tokenize(self):
-        """执行词法分析，生成详细的 Token 对象列表"""
+        """
+        执行词法分析，生成详细的 Token 对象列表。
+        按当前字符的编码查 _DISPATCH 表，直接跳到对应的扫描函数，
+        每个扫描函数消费若干字符并返回新的位置。
+        """
         self.tokens = []
-        self.errors = [] 
-        line_num = 1
-        line_start = 0
-
-        for mo in self.regex.finditer(self.source):
-            kind = mo.lastgroup
-            value = mo.group()
-            # 计算列号：当前位置 - 当前行起始位置 + 1
-            column = mo.start() - line_start + 1
-
-            if kind == 'SKIP':
-                continue
-            elif kind == 'NEWLINE':
-                line_num += 1
-                line_start = mo.end()
-                continue
-            elif kind == 'COMMENT':
-                # 处理跨行注释，需要更新行号
-                newlines = value.count('\n')
-                if newlines > 0:
-                    line_num += newlines
-                    line_start = mo.end() - (len(value) - value.rfind('\n') - 1)
-                continue
-
-            elif kind == 'NUMBER':
-                # 数值溢出检查
-                try:
-                    num_val = int(value)
-                    if num_val > MAX_INT:
-                        self._record_error(f"数值溢出: '{value}' 超过最大值 {MAX_INT}", line_num, column)
-                except ValueError:
-                    self._record_error(f"无效数字: {value}", line_num, column)
-
-            elif kind == 'ID':
-                # 检查是否为关键字
-                upper_value = value.upper()
-                if upper_value in KEYWORDS:
-                    kind = upper_value
-
-            elif kind == 'MISMATCH':
-                # 记录错误但不崩溃，跳过该字符
-                self._record_error(f"非法字符: '{value}'", line_num, column)
-                continue
-
-            token = Token(kind, value, line_num, column)
-            self.tokens.append(token)
+        self._parser_tokens = []
+        self.errors = []
+        self._intern = _INTERN_SEED[:]
+
+        src = self.source
+        # 每行起始位置，行号/列号通过二分查找得到，扫描时无需逐个换行计数
+        self._line_starts = [0]
+        i = src.find('\n')
+        while i != -1:
+            self._line_starts.append(i + 1)
+            i = src.find('\n', i + 1)
+
+        n = len(src)
+        pos = 0
+        dispatch = _DISPATCH
+        while pos < n:
+            code = ord(src[pos])
+            handler = dispatch[code] if code < 128 else Lexer._scan_non_ascii
+            pos = handler(self, src, pos)
 
         return self.tokens
 
+    def _position(self, pos: int):
+        """源码偏移 -> (行号, 列号)，均从 1 开始"""
+        line = bisect_right(self._line_starts, pos)
+        # 计算列号：当前位置 - 当前行起始位置 + 1
+        return line, pos - self._line_starts[line - 1] + 1
+
+    def _emit(self, kind: str, value: str, pos: int):
+        line, column = self._position(pos)
+        self.tokens.append(Token(kind, value, line, column))
+        # 同时生成 Parser 需要的格式，省去 get_tokens 的二次遍历
+        if kind in _SYMBOL_TYPES:
+            self._parser_tokens.append(('SYMBOL', value, line))
+        else:
+            self._parser_tokens.append((kind, value, line))
+
+    # --- 扫描函数: (src, pos) -> 新的 pos ---
+    def _scan_skip(self, src: str, pos: int) -> int:
+        """空白符(空格、制表符、回车、换行)"""
+        return _SKIP_RE.match(src, pos).end()
+
+    def _scan_id(self, src: str, pos: int) -> int:
+        """标识符或关键字"""
+        mo = _ID_RE.match(src, pos)
+        value = mo.group()
+        # 重复出现的标识符复用同一个字符串对象
+        h = _intern_slot(value)
+        slot = self._intern[h]
+        if slot == value:
+            value = slot
+        else:
+            self._intern[h] = value
+        # 检查是否为关键字 (不区分大小写，只有含大写字母时才需转换)
+        kind = KEYWORD_TYPES.get(value)
+        if kind is None and not value.islower():
+            kind = KEYWORD_TYPES.get(value.lower())
+        if kind is None:
+            kind = 'ID'
+        self._emit(kind, value, pos)
+        return mo.end()
+
+    def _scan_number(self, src: str, pos: int) -> int:
+        mo = _NUM_RE.match(src, pos)
+        value = mo.group()
+        # 数值溢出检查
+        try:
+            num_val = int(value)
+            if num_val > MAX_INT:
+                self._record_error(f"数值溢出: '{value}' 超过最大值 {MAX_INT}", *self._position(pos))
+        except ValueError:
+            self._record_error(f"无效数字: {value}", *self._position(pos))
+        self._emit('NUMBER', value, pos)
+        return mo.end()
+
+    def _scan_lparen(self, src: str, pos: int) -> int:
+        """左括号或注释 (* ... *)"""
+        if src.startswith('*', pos + 1):
+            end = src.find('*)', pos + 2)
+            if end != -1:
+                return end + 2
+        self._emit('LPAREN', '(', pos)
+        return pos + 1
+
+    def _scan_colon(self, src: str, pos: int) -> int:
+        if src.startswith('=', pos + 1):
+            self._emit('ASSIGN', ':=', pos)
+            return pos + 2
+        return self._scan_mismatch(src, pos)
+
+    def _scan_lt(self, src: str, pos: int) -> int:
+        if src.startswith('=', pos + 1):
+            self._emit('LE', '<=', pos)
+            return pos + 2
+        self._emit('LT', '<', pos)
+        return pos + 1
+
+    def _scan_gt(self, src: str, pos: int) -> int:
+        if src.startswith('=', pos + 1):
+            self._emit('GE', '>=', pos)
+            return pos + 2
+        self._emit('GT', '>', pos)
+        return pos + 1
+
+    def _scan_single(self, src: str, pos: int) -> int:
+        ch = src[pos]
+        self._emit(SINGLE_CHAR_TOKENS[ch], ch, pos)
+        return pos + 1
+
+    def _scan_mismatch(self, src: str, pos: int) -> int:
+        # 记录错误但不崩溃，跳过该字符
+        self._record_error(f"非法字符: '{src[pos]}'", *self._position(pos))
+        return pos + 1
+
+    def _scan_non_ascii(self, src: str, pos: int) -> int:
+        # 非 ASCII 字符中只有 Unicode 数字可以构成 Token
+        if src[pos].isdecimal():
+            return self._scan_number(src, pos)
+        return self._scan_mismatch(src, pos)
+
     def _record_error(self, msg: str, line: int, col: int):
         self.errors.append(f"[词法错误] 第 {line} 行, 第 {col} 列: {msg}")
 
@@ -124,24 +214,25 @@ class Lexer:
         返回 Parser 需要的格式。
         格式: [(类型, 值, 行号), ...]
         这是为了让语法分析器在报错时能获取行号。
+        关键字、标识符、赋值号、数字保持原类型，运算符和界符统一为 SYMBOL。
         """
         if not self.tokens:
             self.tokenize()
-
-        mapped = []
-        for t in self.tokens:
-            # 1. 关键字、标识符、赋值号、数字保持原类型
-            if t.type in ('ASSIGN', 'NUMBER', 'ID') or t.type in KEYWORDS:
-                mapped.append((t.type, t.value, t.line))
-            # 2. 运算符和界符，为了配合 Parser 逻辑，可以保留原值或转为 SYMBOL
-            else:
-                if t.type in ('LE', 'GE'):
-                    symval = '<=' if t.type == 'LE' else '>='
-                    mapped.append(('SYMBOL', symval, t.line))
-                elif t.type in ('EQ', 'NE', 'LT', 'GT', 'PLUS', 'MINUS', 'TIMES', 'SLASH', 
-                                'LPAREN', 'RPAREN', 'COMMA', 'PERIOD', 'SEMICOLON'):
-                    mapped.append(('SYMBOL', t.value, t.line))
-                else:
-                    mapped.append((t.type, t.value, t.line))
-
-        return mapped
\ No newline at end of file
+        # 返回副本，调用方修改列表不会影响词法分析器内部的状态
+        return list(self._parser_tokens)
+
+# 首字符分派表：ASCII 编码 -> 扫描函数，未登记的字符一律按非法字符处理
+_DISPATCH = [Lexer._scan_mismatch] * 128
+for _ch in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz':
+    _DISPATCH[ord(_ch)] = Lexer._scan_id
+for _ch in '0123456789':
+    _DISPATCH[ord(_ch)] = Lexer._scan_number
+for _ch in SINGLE_CHAR_TOKENS:
+    _DISPATCH[ord(_ch)] = Lexer._scan_single
+for _ch in ' \t\r\n':
+    _DISPATCH[ord(_ch)] = Lexer._scan_skip
+_DISPATCH[ord('(')] = Lexer._scan_lparen
+_DISPATCH[ord(':')] = Lexer._scan_colon
+_DISPATCH[ord('<')] = Lexer._scan_lt
+_DISPATCH[ord('>')] = Lexer._scan_gt
+del _ch
\ No newline at end of file
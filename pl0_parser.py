@@ -1,294 +1,405 @@
-from collections import defaultdict, deque
+import functools
+from collections import deque
+from itertools import chain
+
+# 压缩分析表中的动作编码：高 8 位为动作类型，低 24 位为参数 (状态号/产生式编号)
+ACT_ERROR, ACT_SHIFT, ACT_REDUCE, ACT_ACCEPT = range(4)
+ACT_SHIFT_BITS = 24
+ACT_ARG_MASK = (1 << ACT_SHIFT_BITS) - 1
+
+# FIRST 集中表示空串 ε 的元素
+_EPS = ''
+
+
+# PL/0 的简化文法产生式 (LHS -> RHS)，全部为元组，可直接作为分析表的缓存键
+PL0_GRAMMAR = (
+    ('program', ('block', '.')),
+    ('block', ('consts', 'vars', 'procs', 'statement')),
+    ('consts', ()),
+    ('consts', ('CONST', 'const_list', ';')),
+    ('const_list', ('ID', '=', 'NUMBER')),
+    ('const_list', ('ID', '=', 'NUMBER', ',', 'const_list')),
+    ('vars', ()),
+    ('vars', ('VAR', 'id_list', ';')),
+    ('id_list', ('ID',)),
+    ('id_list', ('ID', ',', 'id_list')),
+    ('procs', ()),
+    ('procs', ('PROCEDURE', 'ID', ';', 'block', ';', 'procs')),
+    ('statement', ()),  # 允许空语句
+    ('statement', ('ID', 'ASSIGN', 'expression')),
+    ('statement', ('CALL', 'ID')),
+    ('statement', ('BEGIN', 'stmt_list', 'END')),
+    ('statement', ('IF', 'condition', 'THEN', 'statement')),
+    ('statement', ('WHILE', 'condition', 'DO', 'statement')),
+    ('statement', ('READ', '(', 'ID', ')')),
+    ('statement', ('WRITE', '(', 'expression', ')')),
+    ('stmt_list', ('statement',)),
+    ('stmt_list', ('statement', ';', 'stmt_list')),
+    ('expression', ('term',)),
+    ('expression', ('term', '+', 'expression')),
+    ('expression', ('term', '-', 'expression')),
+    ('term', ('factor',)),
+    ('term', ('factor', '*', 'term')),
+    ('term', ('factor', '/', 'term')),
+    ('factor', ('ID',)),
+    ('factor', ('NUMBER',)),
+    ('factor', ('(', 'expression', ')')),
+    ('condition', ('ODD', 'expression')),
+    ('condition', ('expression', 'relop', 'expression')),
+    ('relop', ('=',)),
+    ('relop', ('#',)),
+    ('relop', ('<',)),
+    ('relop', ('>',)),
+    ('relop', ('<=',)),
+    ('relop', ('>=',)),
+)
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_tables(parser_cls, grammar):
+    """进程内按文法缓存分析表：同一文法只构建一次"""
+    return parser_cls._build_tables(grammar)
+
 
 class SLRParser:
+    # 文法是固定的，LR(0) 项集族与 ACTION/GOTO 表按文法缓存，所有实例共享
+    grammar = PL0_GRAMMAR
+
     def __init__(self, tokens):
-        # tokens 格式期望为 [(type, value, line), ...]
+        # tokens 格式期望为 [(type, value, line), ...]，
+        # 也可以是任意可迭代对象，parse() 只顺序遍历一次
         self.tokens = tokens
-        self.terminals = set()
-        self.nonterminals = set()
-        self.productions = []
-        self.start_symbol = 'S'
+        # 分析表只读，直接引用共享的构建结果
+        self.__dict__.update(self._get_tables())
+
+    @classmethod
+    def _get_tables(cls):
+        """返回共享的分析表，首次调用时构建"""
+        return _cached_tables(cls, cls.grammar)
+
+    @classmethod
+    def warm_tables(cls):
+        """预先构建分析表，之后创建的分析器直接复用，无需在首次分析时等待"""
+        cls._get_tables()
+
+    @classmethod
+    def _build_tables(cls, grammar):
+        """构建文法、项集族、FIRST/FOLLOW 与分析表，返回属性字典"""
+        builder = object.__new__(cls)
+        builder.terminals = set()
+        builder.nonterminals = set()
+        builder.productions = []
+        builder.start_symbol = 'S'
         
         # 初始化构建过程
-        self._build_grammar()
-        self._collect_symbols()
-        self._augment_grammar()
-        self.states = []
-        self.goto_table = {}
-        self.action = {}
-        self._build_canonical_collection()
-        self._compute_first_follow()
-        self._build_parsing_table()
-
-    def _build_grammar(self):
-        """定义 PL/0 的简化文法产生式 (LHS -> RHS list)"""
-        G = [
-            ('program', ['block', '.']),
-            ('block', ['consts', 'vars', 'procs', 'statement']),
-            ('consts', []),
-            ('consts', ['CONST', 'const_list', ';']),
-            ('const_list', ['ID', '=', 'NUMBER', 'const_list_tail']),
-            ('const_list_tail', []),
-            ('const_list_tail', [',', 'ID', '=', 'NUMBER', 'const_list_tail']),
-            ('vars', []),
-            ('vars', ['VAR', 'id_list', ';']),
-            ('id_list', ['ID', 'id_list_tail']),
-            ('id_list_tail', []),
-            ('id_list_tail', [',', 'ID', 'id_list_tail']),
-            ('procs', []),
-            ('procs', ['PROCEDURE', 'ID', ';', 'block', ';', 'procs']),
-            ('statement', []),  # 允许空语句
-            ('statement', ['ID', 'ASSIGN', 'expression']),
-            ('statement', ['CALL', 'ID']),
-            ('statement', ['BEGIN', 'stmt_list', 'END']),
-            ('statement', ['IF', 'condition', 'THEN', 'statement']),
-            ('statement', ['WHILE', 'condition', 'DO', 'statement']),
-            ('statement', ['READ', '(', 'ID', ')']),
-            ('statement', ['WRITE', '(', 'expression', ')']),
-            ('stmt_list', ['statement', 'stmt_list_tail']),
-            ('stmt_list_tail', []),
-            ('stmt_list_tail', [';', 'statement', 'stmt_list_tail']),
-            ('expression', ['term', 'expression_tail']),
-            ('expression_tail', []),
-            ('expression_tail', ['+', 'term', 'expression_tail']),
-            ('expression_tail', ['-', 'term', 'expression_tail']),
-            ('term', ['factor', 'term_tail']),
-            ('term_tail', []),
-            ('term_tail', ['*', 'factor', 'term_tail']),
-            ('term_tail', ['/', 'factor', 'term_tail']),
-            ('factor', ['ID']),
-            ('factor', ['NUMBER']),
-            ('factor', ['(', 'expression', ')']),
-            ('condition', ['ODD', 'expression']),
-            ('condition', ['expression', 'relop', 'expression']),
-            ('relop', ['=']),
-            ('relop', ['#']),
-            ('relop', ['<']),
-            ('relop', ['>']),
-            ('relop', ['<=']),
-            ('relop', ['>=']),
-        ]
-        self.productions = G
+        builder._build_grammar(grammar)
+        builder._collect_symbols()
+        builder._augment_grammar()
+        builder.states = []
+        builder._compute_first_follow()
+        builder._build_canonical_collection()
+        builder._flatten_tables()
+        return vars(builder)
+
+    def _build_grammar(self, grammar):
+        """载入文法产生式 (LHS -> RHS)"""
+        self.productions = list(grammar)
 
     def _collect_symbols(self):
-        """收集所有的终结符和非终结符"""
-        for lhs, rhs in self.productions:
-            self.nonterminals.add(lhs)
-            for sym in rhs:
-                # 简单的大写判断法，排除特定的运算符符号
-                if sym.isupper() and sym not in ('=', '+', '-', '*', '/', ',', ';', '.', '(', ')', '<=', '>=', '<', '>', '#'):
-                    pass 
-        
+        """收集所有的终结符和非终结符：出现在左部的是非终结符，其余右部符号为终结符"""
+        self.nonterminals.update(lhs for lhs, _ in self.productions)
         all_rhs_syms = set(sym for _, rhs in self.productions for sym in rhs)
         self.terminals = set(s for s in all_rhs_syms if s not in self.nonterminals)
 
     def _augment_grammar(self):
         """拓广文法：添加 S' -> program"""
-        self.productions.insert(0, (self.start_symbol, ['program']))
+        self.productions.insert(0, (self.start_symbol, ('program',)))
         self.nonterminals.add(self.start_symbol)
 
     # --- LR(0) 项集族构建逻辑 ---
+    # 每个项目 (lhs, rhs, dot) 驻留为一个整数编号，项集表示为编号的有序元组，
+    # 项集的哈希与比较只涉及整数元组
+    def _item_id(self, lhs, rhs, dot):
+        key = (lhs, rhs, dot)
+        iid = self._item_ids.get(key)
+        if iid is None:
+            iid = len(self._items_list)
+            self._item_ids[key] = iid
+            self._items_list.append(key)
+        return iid
+
     def _closure(self, items):
-        closure = set(items)
-        added = True
-        while added:
-            added = False
-            new_items = set()
-            for (lhs, rhs, dot) in closure:
-                if dot < len(rhs):
-                    B = rhs[dot]
-                    if B in self.nonterminals:
-                        for (p_lhs, p_rhs) in self.productions:
-                            if p_lhs == B:
-                                itm = (p_lhs, tuple(p_rhs), 0)
-                                if itm not in closure:
-                                    new_items.add(itm)
-            if new_items:
-                closure |= new_items
-                added = True
-        return frozenset(closure)
-
-    def _goto(self, state, X):
-        moved = set()
-        for (lhs, rhs, dot) in state:
-            if dot < len(rhs) and rhs[dot] == X:
-                moved.add((lhs, rhs, dot + 1))
-        if not moved:
-            return None
-        return self._closure(moved)
+        key = frozenset(items)
+        cached = self._closure_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # 工作表只处理新加入的项目，避免每轮重扫整个闭包
+        closure = set(key)
+        worklist = deque(key)
+        while worklist:
+            lhs, rhs, dot = self._items_list[worklist.popleft()]
+            if dot < len(rhs):
+                B = rhs[dot]
+                for (p_lhs, p_rhs) in self._prods_by_lhs.get(B, ()):
+                    itm = self._item_id(p_lhs, p_rhs, 0)
+                    if itm not in closure:
+                        closure.add(itm)
+                        worklist.append(itm)
+
+        result = tuple(sorted(closure))
+        self._closure_cache[key] = result
+        return result
 
     def _items(self):
-        start_item = (self.start_symbol, tuple(self.productions[0][1]), 0)
+        """
+        构建 LR(0) 项集族，同时直接填写分析表：
+        每个状态出队时即写入其归约/接受动作，求出转移时写入移进或 GOTO，
+        无需事后再遍历一遍所有项集。要求 FOLLOW 集已经算好。
+        """
+        start_item = self._item_id(self.start_symbol, self.productions[0][1], 0)
         I0 = self._closure([start_item])
         C = [I0]
-        queue = deque([I0])
+        state_id = {I0: 0}  # 项集 -> 状态编号，O(1) 判重与取号
+        queue = deque([(0, I0)])
         transitions = {}
+        # 每个状态一行普通 dict，只登记实际存在的动作/转移，缺省即为出错
+        self.action = [{}]
+        self.goto = [{}]
+        # 同一产生式的归约动作在各状态间共享同一个元组
+        reduce_actions = [('r', idx) for idx in range(len(self.productions))]
         
         while queue:
-            I = queue.popleft()
-            syms = set()
-            for (lhs, rhs, dot) in I:
+            i, I = queue.popleft()
+            # 一次扫描项集：按圆点后的符号分组，直接得到各转移的核心项目 (圆点已右移)
+            by_sym = {}
+            for iid in I:
+                lhs, rhs, dot = self._items_list[iid]
                 if dot < len(rhs):
-                    syms.add(rhs[dot])
-            for X in syms:
-                J = self._goto(I, X)
-                if J is None: continue
-                if J not in C:
+                    by_sym.setdefault(rhs[dot], []).append(self._item_id(lhs, rhs, dot + 1))
+                elif lhs == self.start_symbol:
+                    self.action[i]['$'] = ('acc',)
+                else:
+                    reduce_act = reduce_actions[self._prod_idx[(lhs, rhs)]]
+                    row = self.action[i]
+                    for a in self.FOLLOW[lhs]:
+                        if a not in row:
+                            row[a] = reduce_act
+            for X, moved in by_sym.items():
+                J = self._closure(moved)
+                j = state_id.get(J)
+                if j is None:
+                    j = len(C)
+                    state_id[J] = j
                     C.append(J)
-                    queue.append(J)
-                transitions[(C.index(I), X)] = C.index(J)
+                    queue.append((j, J))
+                    self.action.append({})
+                    self.goto.append({})
+                transitions[(i, X)] = j
+                # 移进优先于归约
+                if X in self.terminals:
+                    self.action[i][X] = ('s', j)
+                else:
+                    self.goto[i][X] = j
         return C, transitions
 
     def _build_canonical_collection(self):
-        self.productions = [(lhs, tuple(rhs)) for lhs, rhs in self.productions]
+        # 产生式 -> 编号，归约时 O(1) 查找
+        self._prod_idx = {prod: idx for idx, prod in enumerate(self.productions)}
+        # 按左部分组的产生式，求闭包时只需遍历对应非终结符的产生式
+        self._prods_by_lhs = {}
+        for prod in self.productions:
+            self._prods_by_lhs.setdefault(prod[0], []).append(prod)
+        self._items_list = []  # 项目编号 -> (lhs, rhs, dot)，用于解读 self.states
+        self._item_ids = {}    # (lhs, rhs, dot) -> 项目编号，仅构建期间使用
+        self._closure_cache = {}  # 核心项集 -> 闭包，仅构建期间使用
         C, transitions = self._items()
+        del self._item_ids, self._closure_cache
         self.states = C
         self.transitions = transitions
 
     # --- First & Follow 集计算 ---
     def _compute_first_follow(self):
-        self.FIRST = {nt: set() for nt in self.nonterminals}
-        
-        def first_of_sequence(seq):
-            res = set()
-            if not seq:
-                res.add('')
-                return res
-            for sym in seq:
-                if sym in self.terminals:
-                    res.add(sym)
-                    break
-                elif sym in self.nonterminals:
-                    res |= (self.FIRST[sym] - set(['']))
-                    if '' not in self.FIRST[sym]:
-                        break
-                else: 
-                    res.add(sym)
-                    break
-            else:
-                res.add('')
-            return res
-
-        # FIRST
+        # 可空非终结符：先求出来，FIRST/FOLLOW 计算时直接查表判断能否推出空串
+        nullable = {lhs for lhs, rhs in self.productions if not rhs}
         changed = True
         while changed:
             changed = False
             for lhs, rhs in self.productions:
-                before = set(self.FIRST[lhs])
-                if not rhs:
-                    self.FIRST[lhs].add('')
-                else:
-                    self.FIRST[lhs] |= first_of_sequence(rhs)
-                if self.FIRST[lhs] != before:
+                if lhs not in nullable and all(sym in nullable for sym in rhs):
+                    nullable.add(lhs)
                     changed = True
+        self.nullable = nullable
 
-        # FOLLOW
-        self.FOLLOW = {nt: set() for nt in self.nonterminals}
-        self.FOLLOW[self.start_symbol].add('$')
-        changed = True
-        while changed:
-            changed = False
-            for lhs, rhs in self.productions:
-                rhs_list = list(rhs)
-                for i, B in enumerate(rhs_list):
-                    if B in self.nonterminals:
-                        beta = rhs_list[i+1:]
-                        first_beta = first_of_sequence(beta)
-                        before = set(self.FOLLOW[B])
-                        self.FOLLOW[B] |= (first_beta - set(['']))
-                        if '' in first_beta:
-                            self.FOLLOW[B] |= self.FOLLOW[lhs]
-                        if self.FOLLOW[B] != before:
-                            changed = True
-
-    # --- 构建 Action 和 Goto 表 ---
-    def _build_parsing_table(self):
-        N = len(self.states)
-        self.action = [defaultdict(lambda: None) for _ in range(N)]
-        self.goto = [defaultdict(lambda: None) for _ in range(N)]
-        prod_list = list(self.productions)
+        # FIRST/FOLLOW 内部用整数位图表示：每个终结符 (含 '$') 占一位，ε 占最高位，
+        # 集合并/差/包含判断都变成一次整数位运算
+        term_bit = {t: 1 << i for i, t in enumerate(sorted(self.terminals) + ['$'])}
+        EPS = 1 << len(term_bit)
+        first = {nt: (EPS if nt in nullable else 0) for nt in self.nonterminals}
 
-        for i, I in enumerate(self.states):
-            for (lhs, rhs, dot) in I:
-                if dot < len(rhs):
-                    a = rhs[dot]
-                    if a in self.terminals:
-                        to_state = self.transitions.get((i, a))
-                        if to_state is not None:
-                            self.action[i][a] = ('s', to_state)
+        def first_of_sequence(seq):
+            """FIRST(seq) - {ε}：从左向右合并，遇到不可空的符号即停止"""
+            res = 0
+            for sym in seq:
+                if sym in self.nonterminals:
+                    res |= first[sym]
+                    if sym not in nullable:
+                        break
                 else:
-                    if lhs == self.start_symbol:
-                        self.action[i]['$'] = ('acc',)
+                    res |= term_bit[sym]
+                    break
+            return res & ~EPS
+
+        # FIRST：工作表迭代，只有产生式可见前缀 (直到第一个不可空符号) 中
+        # 非终结符的 FIRST 变化时才重算该产生式
+        users = {nt: [] for nt in self.nonterminals}  # B -> 依赖 FIRST(B) 的产生式编号
+        for idx, (lhs, rhs) in enumerate(self.productions):
+            for sym in rhs:
+                if sym not in self.nonterminals:
+                    break
+                users[sym].append(idx)
+                if sym not in nullable:
+                    break
+
+        worklist = deque(range(len(self.productions)))
+        queued = set(worklist)
+        while worklist:
+            idx = worklist.popleft()
+            queued.discard(idx)
+            lhs, rhs = self.productions[idx]
+            new = first_of_sequence(rhs)
+            if new & ~first[lhs]:
+                first[lhs] |= new
+                for j in users[lhs]:
+                    if j not in queued:
+                        queued.add(j)
+                        worklist.append(j)
+
+        # FOLLOW：每条产生式从右向左扫描一次，增量维护后缀 beta 的 FIRST 与可空性；
+        # 若 beta 可推出空串，则 FOLLOW[lhs] 需传播到 FOLLOW[B]，沿依赖边按工作表传播
+        follow = {nt: 0 for nt in self.nonterminals}
+        follow[self.start_symbol] = term_bit['$']
+        follow_edges = {nt: set() for nt in self.nonterminals}  # lhs -> {B}
+        for lhs, rhs in self.productions:
+            first_tail = 0        # FIRST(rhs[i+1:]) - {ε}
+            tail_nullable = True  # rhs[i+1:] 能否推出空串
+            for B in reversed(rhs):
+                if B in self.nonterminals:
+                    follow[B] |= first_tail
+                    if tail_nullable and B != lhs:
+                        follow_edges[lhs].add(B)
+                    first_b = first[B] & ~EPS
+                    if B in nullable:
+                        first_tail |= first_b
                     else:
-                        prod_idx = -1
-                        for idx, prod in enumerate(prod_list):
-                            if prod[0] == lhs and prod[1] == rhs:
-                                prod_idx = idx
-                                break
-                        for a in self.FOLLOW[lhs]:
-                            if self.action[i][a] is None:
-                                self.action[i][a] = ('r', prod_idx)
-            
-            for A in self.nonterminals:
-                to = self.transitions.get((i, A))
-                if to is not None:
-                    self.goto[i][A] = to
+                        first_tail = first_b
+                        tail_nullable = False
+                else:
+                    first_tail = term_bit[B]
+                    tail_nullable = False
 
-    # --- 核心解析方法 ---
-    def _token_to_terminal(self, token):
-        """将 Token 对象转换为文法终结符字符串"""
-        if token is None: return '$'
-        # Token 格式: (type, value, line)
-        sym_type, sym_val, _ = token
-        
-        if sym_type == 'SYMBOL':
-            return sym_val 
-        return sym_type
+        worklist = deque(self.nonterminals)
+        queued = set(worklist)
+        while worklist:
+            A = worklist.popleft()
+            queued.discard(A)
+            for B in follow_edges[A]:
+                if follow[A] & ~follow[B]:
+                    follow[B] |= follow[A]
+                    if B not in queued:
+                        queued.add(B)
+                        worklist.append(B)
 
+        # FIRST 对外以集合形式提供 (ε 记为 _EPS)；FOLLOW 已经稳定，冻结为有序元组，
+        # 填表时逐个遍历即可
+        bit_terms = [(b, t) for t, b in term_bit.items()] + [(EPS, _EPS)]
+        self.FIRST = {nt: {t for b, t in bit_terms if bits & b} for nt, bits in first.items()}
+        self.FOLLOW = {nt: tuple(t for b, t in bit_terms if bits & b) for nt, bits in follow.items()}
+
+    def _flatten_tables(self):
+        """
+        将 ACTION/GOTO 压缩为按整数编号索引的一维表，分析时只需一次下标访问：
+          action_tbl[state * n_terms + term_id] = (动作类型 << 24) | 参数
+          goto_tbl[state * n_nonterms + nt_id] = 目标状态，-1 表示无
+        终结符表末尾多留一列给未知符号，该列恒为 ACT_ERROR。
+        各表直接用 list 存放并随分析表一起缓存，parse() 无需每次转换。
+        """
+        self.term_id = {t: i for i, t in enumerate(sorted(self.terminals) + ['$'])}
+        self.nt_id = {nt: i for i, nt in enumerate(sorted(self.nonterminals))}
+        self.unknown_term_id = len(self.term_id)
+        n_terms = self.n_terms = len(self.term_id) + 1
+        n_nonterms = self.n_nonterms = len(self.nt_id)
+        N = len(self.states)
+
+        self.action_tbl = [0] * (N * n_terms)
+        self.goto_tbl = [-1] * (N * n_nonterms)
+        codes = {'s': ACT_SHIFT, 'r': ACT_REDUCE, 'acc': ACT_ACCEPT}
+        for i in range(N):
+            for a, act in self.action[i].items():
+                arg = act[1] if len(act) > 1 else 0
+                self.action_tbl[i * n_terms + self.term_id[a]] = (codes[act[0]] << ACT_SHIFT_BITS) | arg
+            for A, to in self.goto[i].items():
+                self.goto_tbl[i * n_nonterms + self.nt_id[A]] = to
+
+        # 每条产生式的右部长度与左部编号，归约时直接查表
+        self.prod_len = [len(rhs) for _, rhs in self.productions]
+        self.prod_lhs = [self.nt_id[lhs] for lhs, _ in self.productions]
+
+    # --- 核心解析方法 ---
     def parse(self):
         """
         执行语法分析
         :return: True (如果成功)
         :raise: SyntaxError (如果失败，包含行号)
         """
-        terms = [self._token_to_terminal(t) for t in self.tokens]
-        terms.append('$')
-        
+        # 热循环中用到的属性全部绑定为局部变量，避免每步重复的属性查找
+        action_tbl = self.action_tbl
+        goto_tbl = self.goto_tbl
+        prod_len = self.prod_len
+        prod_lhs = self.prod_lhs
+        n_terms = self.n_terms
+        n_nonterms = self.n_nonterms
+        term_id_get = self.term_id.get
+        unknown_term_id = self.unknown_term_id
+        eof_id = self.term_id['$']
+
         stack = [0]
-        ip = 0 # 输入指针
-        
-        while True:
-            state = stack[-1]
-            a = terms[ip]
-            act = self.action[state].get(a)
-
-            # --- 错误捕获 ---
-            if act is None:
-                current_token = self.tokens[ip] if ip < len(self.tokens) else None
-                if current_token:
-                    t_type, t_val, t_line = current_token
+        stack_append = stack.append
+
+        # 外层每轮读入一个向前看符号 (输入结束时为 None)，内层连续归约直到将其移进。
+        # Token 格式: (type, value, line)；对应的文法终结符：SYMBOL 取其值，其余取类型，结束符为 '$'
+        for token in chain(self.tokens, (None,)):
+            if token is None:
+                la_id = eof_id
+            else:
+                # 一次解包，后续 (包括报错) 直接使用局部变量
+                t_type, t_val, t_line = token
+                la_id = term_id_get(t_val if t_type == 'SYMBOL' else t_type, unknown_term_id)
+
+            while True:
+                cell = action_tbl[stack[-1] * n_terms + la_id]
+                op = cell >> ACT_SHIFT_BITS
+
+                # --- 动作执行 ---
+                if op == ACT_SHIFT: # 移进
+                    stack_append(cell & ACT_ARG_MASK)
+                    break
+                elif op == ACT_REDUCE: # 归约
+                    prod_idx = cell & ACT_ARG_MASK
+                    rhs_len = prod_len[prod_idx]
+                    if rhs_len:
+                        # 一次切片删除弹出整个右部，不再逐个 pop
+                        del stack[-rhs_len:]
+
+                    goto_state = goto_tbl[stack[-1] * n_nonterms + prod_lhs[prod_idx]]
+                    if goto_state < 0:
+                        lhs = self.productions[prod_idx][0]
+                        raise SyntaxError(f"严重错误: 归约后无法进行状态转移 {lhs}")
+                    stack_append(goto_state)
+                elif op == ACT_ACCEPT: # 接受
+                    return True
+                # --- 错误捕获 ---
+                elif token:
                     raise SyntaxError(f"在第 {t_line} 行附近发现语法错误: 意外的 Token '{t_val}'")
                 else:
                     raise SyntaxError("语法错误: 文件意外结束 (Incomplete input)")
-
-            # --- 动作执行 ---
-            if act[0] == 's': # 移进
-                stack.append(act[1])
-                ip += 1
-            elif act[0] == 'r': # 归约
-                prod_idx = act[1]
-                lhs, rhs = self.productions[prod_idx]
-                rhs_len = len(rhs)
-                if rhs_len > 0:
-                    for _ in range(rhs_len):
-                        stack.pop()
-                
-                state_t = stack[-1]
-                goto_state = self.goto[state_t].get(lhs)
-                if goto_state is None:
-                    raise SyntaxError(f"严重错误: 归约后无法进行状态转移 {lhs}")
-                stack.append(goto_state)
-            elif act[0] == 'acc': # 接受
-                return True
-            else:
-                raise SyntaxError("未知解析动作")
\ No newline at end of file
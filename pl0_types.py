@@ -1,29 +1,40 @@
-from enum import Enum, auto
+from enum import IntEnum
 
-# P-Code 指令类型
-class OpCode(Enum):
-    LIT = "LIT" # Load Constant: 将常量放入栈顶
-    OPR = "OPR" # Operation: 执行算术或逻辑运算
-    LOD = "LOD" # Load Variable: 将变量值放入栈顶
-    STO = "STO" # Store Variable: 将栈顶值存入变量
-    CAL = "CAL" # Call Procedure: 调用过程
-    INT = "INT" # Increment: 在栈中分配空间
-    JMP = "JMP" # Jump: 无条件跳转
-    JPC = "JPC" # Jump Conditional: 条件跳转 (栈顶为0跳转)
-    RED = "RED" # Read: 读入输入
-    WRT = "WRT" # Write: 输出栈顶
+# P-Code 指令类型 (IntEnum：比较、作下标时与普通整数一样廉价)
+class OpCode(IntEnum):
+    LIT = 0 # Load Constant: 将常量放入栈顶
+    OPR = 1 # Operation: 执行算术或逻辑运算
+    LOD = 2 # Load Variable: 将变量值放入栈顶
+    STO = 3 # Store Variable: 将栈顶值存入变量
+    CAL = 4 # Call Procedure: 调用过程
+    INT = 5 # Increment: 在栈中分配空间
+    JMP = 6 # Jump: 无条件跳转
+    JPC = 7 # Jump Conditional: 条件跳转 (栈顶为0跳转)
+    RED = 8 # Read: 读入输入
+    WRT = 9 # Write: 输出栈顶
+
+# 与 OpCode 一一对应的纯整数常量，供 VM 加载、分派等热路径使用
+LIT, OPR, LOD, STO, CAL, INT, JMP, JPC, RED, WRT = (int(op) for op in OpCode)
+
+# 操作码 -> 助记符，按下标取名，打印指令时不经过 Enum 的 name 属性
+_OP_NAMES = tuple(op.name for op in OpCode)
 
 # 运算符映射
 OPR_MAP = {
     '+': 2, '-': 3, '*': 4, '/': 5,
     'odd': 6, '=': 8, '#': 9, '<': 10, '>': 12, '<=': 13, '>=': 11
 }
+# 预先绑定的查表函数，代码生成时 OPR_GET(op) 一次 C 调用即可取得 OPR 编号
+OPR_GET = OPR_MAP.__getitem__
 
 class Instruction:
+    __slots__ = ('f', 'l', 'a')
+
     def __init__(self, f, l, a):
         self.f = f  # Function code (OpCode)
         self.l = l  # Level difference (层差)
         self.a = a  # Address/Value (位移或数值)
 
     def __repr__(self):
-        return f"{self.f.value}\t{self.l}\t{self.a}"
\ No newline at end of file
+        # 不缓存结果：回填跳转地址时 a 会被修改
+        return f"{_OP_NAMES[self.f]}\t{self.l}\t{self.a}"
\ No newline at end of file
@@ -1,4 +1,68 @@
-from pl0_types import OpCode
+from array import array
+
+from pl0_types import OpCode, LIT, OPR, LOD, STO, CAL, INT, JMP, JPC, RED, WRT
+
+# VM 内部使用的特化指令，编号接在 OpCode 之后，只出现在加载后的 op 数组中
+OP_LOD0, OP_STO0, OP_CAL0 = range(len(OpCode), len(OpCode) + 3)  # 层差为 0 的 LOD/STO/CAL
+# 超级指令：LOD 0 a / LIT 0 a 与其后的二元 OPR k 合并为一条，lev 槽存放 k；
+# "LIT 0 v; STO 0 a" (x := 常量) 合并为一条，lev 槽存放常量 v
+OP_LOD0_OPR, OP_LIT_OPR, OP_LIT_STO0 = range(len(OpCode) + 3, len(OpCode) + 6)
+# OPR k (k = 0..13) 展开为各自的操作码 OP_OPR0 + k，一次分派直达对应的运算
+OP_OPR0 = len(OpCode) + 6
+N_OPR = 14
+N_OPS = OP_OPR0 + N_OPR
+
+# 会跳转的指令，其 adr 是指令下标，合并指令后需要重新映射
+JUMP_OPS = frozenset({JMP, JPC, CAL})
+
+# 二元 OPR 子操作：OPR 编号 -> (次栈顶, 栈顶) 的运算结果，None 表示不是二元运算
+BINARY_OPR = (
+    None, None,
+    lambda x, y: x + y,
+    lambda x, y: x - y,
+    lambda x, y: x * y,
+    lambda x, y: x // y,  # 整除
+    None, None,
+    lambda x, y: 1 if x == y else 0,
+    lambda x, y: 1 if x != y else 0,
+    lambda x, y: 1 if x < y else 0,
+    lambda x, y: 1 if x >= y else 0,
+    lambda x, y: 1 if x > y else 0,
+    lambda x, y: 1 if x <= y else 0,
+)
+
+# 与 BINARY_OPR 对应的源码模板，供 compile_to_python 生成内联的运算语句
+BINARY_EXPR = (
+    None, None,
+    '{x} + {y}',
+    '{x} - {y}',
+    '{x} * {y}',
+    '{x} // {y}',
+    None, None,
+    '1 if {x} == {y} else 0',
+    '1 if {x} != {y} else 0',
+    '1 if {x} < {y} else 0',
+    '1 if {x} >= {y} else 0',
+    '1 if {x} > {y} else 0',
+    '1 if {x} <= {y} else 0',
+)
+
+
+class VMError(Exception):
+    """P-Code 程序本身的错误 (如未定义的 OPR 操作)，由 VM 检查后抛出"""
+
+
+def _runtime_error(e):
+    """P-Code 程序引发的异常 -> 返回给调用方的错误信息"""
+    if isinstance(e, ZeroDivisionError):
+        return "Runtime Error: 除数为零"
+    if isinstance(e, IndexError):
+        return "Runtime Error: 栈访问越界"
+    # VMError (未定义的 OPR 操作等)、无法转换为整数的输入
+    return f"Runtime Error: {e}"
+
+# 只处理 P-Code 程序本身可能引发的错误，VM 自身的缺陷照常抛出
+_RUNTIME_ERRORS = (VMError, ZeroDivisionError, IndexError, ValueError)
 
 class VM:
     def __init__(self, code, input_data=[]):
@@ -8,8 +72,84 @@ class VM:
         self.bp = 0   # Base Pointer (Current stack frame)
         self.sp = -1  # Stack Pointer
         self.input_buffer = input_data
+        # 下一个待读入的输入下标。只移动游标，不修改调用方传入的输入序列
+        self._input_pos = 0
         self.output_buffer = []
 
+        # 指令预先拆成三个并行的序列 (操作码/层差/地址)，
+        # 执行时按 pc 下标取值，不再访问 Instruction 对象的属性。
+        # 操作码是小整数，用紧凑的 array；层差和地址 (含常量) 与栈上的值一样
+        # 是不限大小的 Python 整数，用 list 保存
+        self.op = array('b', [i.f for i in code])
+        self.lev = [i.l for i in code]
+        self.adr = [i.a for i in code]
+        self._fuse()
+        self._specialize()
+
+    def _specialize(self):
+        """
+        加载时按操作数特化指令：访问当前栈帧 (层差为 0) 的 LOD/STO/CAL
+        改写为专用指令，执行时直接使用 bp，省去 base() 的函数调用与循环；
+        OPR k 改写为 OP_OPR0 + k，由分派表直接找到对应运算，无需二次查表。
+        """
+        op, lev, adr = self.op, self.lev, self.adr
+        specialized = {LOD: OP_LOD0, STO: OP_STO0, CAL: OP_CAL0}
+        for pc in range(len(op)):
+            if op[pc] == OPR:
+                if 0 <= adr[pc] < N_OPR:
+                    op[pc] = OP_OPR0 + adr[pc]
+            elif lev[pc] == 0 and op[pc] in specialized:
+                op[pc] = specialized[op[pc]]
+
+    def _fuse(self):
+        """
+        将 "LOD 0 a; OPR k" 与 "LIT 0 a; OPR k" (k 为二元运算) 合并为一条超级指令，
+        直接用操作数与栈顶运算，省去一次分派与栈指针的增减；
+        "LIT 0 v; STO 0 a" 合并为一条，常量直接写入变量。
+        合并指令仍把中间值写入栈顶之上的一格，栈中残留的内容与未合并时相同
+        (未初始化的局部变量会读到这些残留值)。
+        被跳转到的 OPR/STO 不能并入前一条指令；合并后按旧下标 -> 新下标重写跳转目标。
+        """
+        op, lev, adr = self.op, self.lev, self.adr
+        n = len(op)
+        targets = {adr[pc] for pc in range(n) if op[pc] in JUMP_OPS}
+        fused = {LOD: OP_LOD0_OPR, LIT: OP_LIT_OPR}
+
+        new_op, new_lev, new_adr = array('b'), [], []
+        new_index = [0] * (n + 1)
+        pc = 0
+        while pc < n:
+            new_index[pc] = len(new_op)
+            nxt = pc + 1
+            if (op[pc] in fused and lev[pc] == 0 and nxt < n and op[nxt] == OPR
+                    and nxt not in targets
+                    and 0 <= adr[nxt] < N_OPR and BINARY_OPR[adr[nxt]] is not None):
+                new_index[nxt] = len(new_op)
+                new_op.append(fused[op[pc]])
+                new_lev.append(adr[nxt])
+                new_adr.append(adr[pc])
+                pc += 2
+            elif (op[pc] == LIT and nxt < n and op[nxt] == STO and lev[nxt] == 0
+                    and nxt not in targets):
+                new_index[nxt] = len(new_op)
+                new_op.append(OP_LIT_STO0)
+                new_lev.append(adr[pc])
+                new_adr.append(adr[nxt])
+                pc += 2
+            else:
+                new_op.append(op[pc])
+                new_lev.append(lev[pc])
+                new_adr.append(adr[pc])
+                pc += 1
+        if len(new_op) == n:
+            return
+        new_index[n] = len(new_op)
+
+        for pc in range(len(new_op)):
+            if new_op[pc] in JUMP_OPS and 0 <= new_adr[pc] <= n:
+                new_adr[pc] = new_index[new_adr[pc]]
+        self.op, self.lev, self.adr = new_op, new_lev, new_adr
+
     def base(self, l):
         """Find base L levels down"""
         b = self.bp
@@ -20,78 +160,369 @@ class VM:
 
     def run(self):
         print("Running VM...")
+        # 寄存器与栈在执行期间都是 run() 的局部变量；各指令的处理函数是闭包，
+        # 通过 nonlocal 直接读写，不经过 self 的属性查找。结束时再写回 self
+        stack = self.stack
+        pc, bp, sp = self.pc, self.bp, self.sp
+        op, lev, adr = self.op, self.lev, self.adr
+        input_buffer = self.input_buffer
+        input_pos = self._input_pos  # 按下标读取，避免每次 pop(0) 搬移整个列表
+        output_append = self.output_buffer.append
+
+        # 层差 -> 基址的缓存。同一栈帧内静态链不变，只在 CAL/返回切换栈帧时清空
+        base_cache = {}
+
+        def base(l):
+            """Find base L levels down"""
+            b = base_cache.get(l)
+            if b is None:
+                b = bp
+                k = l
+                while k > 0:
+                    b = stack[b] # 静态链在栈帧的 offset 0 处 (取决于具体实现)
+                    k -= 1
+                base_cache[l] = b
+            return b
+
+        # --- 指令处理函数 ---
+        def op_lit(l, a):
+            nonlocal sp
+            sp += 1
+            stack[sp] = a
+
+        def op_lod(l, a): # Load var to stack top
+            nonlocal sp
+            sp += 1
+            # 简化：假设静态链处理正确
+            stack[sp] = stack[base(l) + a]
+
+        def op_sto(l, a):
+            nonlocal sp
+            stack[base(l) + a] = stack[sp]
+            sp -= 1
+
+        def op_cal(l, a): # Call procedure
+            nonlocal pc, bp
+            # 生成新栈帧：SL, DL, RA
+            stack[sp + 1] = base(l) # Static Link
+            stack[sp + 2] = bp      # Dynamic Link
+            stack[sp + 3] = pc      # Return Address
+            bp = sp + 1
+            pc = a
+            base_cache.clear()
+
+        def op_lod0(l, a): # LOD 0 a
+            nonlocal sp
+            sp += 1
+            stack[sp] = stack[bp + a]
+
+        def op_sto0(l, a): # STO 0 a
+            nonlocal sp
+            stack[bp + a] = stack[sp]
+            sp -= 1
+
+        def op_cal0(l, a): # CAL 0 a，静态链即当前栈帧
+            nonlocal pc, bp
+            stack[sp + 1] = bp
+            stack[sp + 2] = bp
+            stack[sp + 3] = pc
+            bp = sp + 1
+            pc = a
+            base_cache.clear()
+
+        def op_lod0_opr(l, a): # LOD 0 a; OPR l
+            y = stack[bp + a]
+            stack[sp + 1] = y
+            stack[sp] = BINARY_OPR[l](stack[sp], y)
+
+        def op_lit_opr(l, a): # LIT 0 a; OPR l
+            stack[sp + 1] = a
+            stack[sp] = BINARY_OPR[l](stack[sp], a)
+
+        def op_lit_sto0(l, a): # LIT 0 l; STO 0 a
+            stack[sp + 1] = l
+            stack[bp + a] = l
+
+        def op_int(l, a): # Alloc stack
+            nonlocal sp
+            sp += a
+
+        def op_jmp(l, a):
+            nonlocal pc
+            pc = a
+
+        def op_jpc(l, a):
+            nonlocal pc, sp
+            if stack[sp] == 0:
+                pc = a
+            sp -= 1
+
+        def op_red(l, a): # Read input into var
+            nonlocal input_pos
+            if input_pos < len(input_buffer):
+                value = input_buffer[input_pos]
+                input_pos += 1
+            else:
+                value = 0
+            stack[base(l) + a] = int(value)
+
+        def op_wrt(l, a):
+            nonlocal sp
+            output_append(str(stack[sp]))
+            sp -= 1
+
+        def op_opr(l, a): # 未定义的 OPR 子操作
+            raise VMError(f"未定义的 OPR 操作: {a}")
+
+        # --- OPR 子操作 ---
+        def opr_ret(l, a): # Return
+            nonlocal pc, bp, sp
+            if bp == 0:
+                raise StopIteration
+            sp = bp - 1
+            pc = stack[sp + 3]
+            bp = stack[sp + 2]
+            base_cache.clear()
+
+        def opr_neg(l, a): # 取负
+            stack[sp] = -stack[sp]
+
+        def opr_add(l, a): # +
+            nonlocal sp
+            stack[sp - 1] += stack[sp]
+            sp -= 1
+
+        def opr_sub(l, a): # -
+            nonlocal sp
+            stack[sp - 1] -= stack[sp]
+            sp -= 1
+
+        def opr_mul(l, a): # *
+            nonlocal sp
+            stack[sp - 1] *= stack[sp]
+            sp -= 1
+
+        def opr_div(l, a): # /
+            nonlocal sp
+            stack[sp - 1] //= stack[sp] # 整除
+            sp -= 1
+
+        def opr_odd(l, a): # odd
+            stack[sp] = stack[sp] % 2
+
+        def opr_eq(l, a): # =
+            nonlocal sp
+            stack[sp - 1] = 1 if stack[sp - 1] == stack[sp] else 0
+            sp -= 1
+
+        def opr_ne(l, a): # #
+            nonlocal sp
+            stack[sp - 1] = 1 if stack[sp - 1] != stack[sp] else 0
+            sp -= 1
+
+        def opr_lt(l, a): # <
+            nonlocal sp
+            stack[sp - 1] = 1 if stack[sp - 1] < stack[sp] else 0
+            sp -= 1
+
+        def opr_ge(l, a): # >=
+            nonlocal sp
+            stack[sp - 1] = 1 if stack[sp - 1] >= stack[sp] else 0
+            sp -= 1
+
+        def opr_gt(l, a): # >
+            nonlocal sp
+            stack[sp - 1] = 1 if stack[sp - 1] > stack[sp] else 0
+            sp -= 1
+
+        def opr_le(l, a): # <=
+            nonlocal sp
+            stack[sp - 1] = 1 if stack[sp - 1] <= stack[sp] else 0
+            sp -= 1
+
+        # 指令分派表：按操作码 (OpCode 的整数值) 下标访问，取代逐条比较的 if/elif 链
+        dispatch = [None] * N_OPS
+        for opcode, handler in (
+            (LIT, op_lit),
+            (OPR, op_opr),
+            (LOD, op_lod),
+            (STO, op_sto),
+            (CAL, op_cal),
+            (INT, op_int),
+            (JMP, op_jmp),
+            (JPC, op_jpc),
+            (RED, op_red),
+            (WRT, op_wrt),
+            (OP_LOD0, op_lod0),
+            (OP_STO0, op_sto0),
+            (OP_CAL0, op_cal0),
+            (OP_LOD0_OPR, op_lod0_opr),
+            (OP_LIT_OPR, op_lit_opr),
+            (OP_LIT_STO0, op_lit_sto0),
+        ):
+            dispatch[opcode] = handler
+        # OPR 子操作按编号登记在 OP_OPR0 之后 (7 号未定义，仍由 op_opr 报错)
+        for k, handler in enumerate((
+            opr_ret, opr_neg, opr_add, opr_sub,
+            opr_mul, opr_div, opr_odd, op_opr,
+            opr_eq, opr_ne, opr_lt, opr_ge,
+            opr_gt, opr_le,
+        )):
+            dispatch[OP_OPR0 + k] = handler
+
+        n = len(op)  # 指令数在执行期间不变
         try:
-            while self.pc < len(self.code):
-                i = self.code[self.pc]
-                self.pc += 1
-                
-                if i.f == OpCode.LIT:
-                    self.sp += 1
-                    self.stack[self.sp] = i.a
-                
-                elif i.f == OpCode.LOD: # Load var to stack top
-                    self.sp += 1
-                    # 简化：假设静态链处理正确
-                    self.stack[self.sp] = self.stack[self.base(i.l) + i.a]
-
-                elif i.f == OpCode.STO:
-                    self.stack[self.base(i.l) + i.a] = self.stack[self.sp]
-                    self.sp -= 1
-
-                elif i.f == OpCode.CAL: # Call procedure
-                    # 生成新栈帧：SL, DL, RA
-                    self.stack[self.sp + 1] = self.base(i.l) # Static Link
-                    self.stack[self.sp + 2] = self.bp       # Dynamic Link
-                    self.stack[self.sp + 3] = self.pc       # Return Address
-                    self.bp = self.sp + 1
-                    self.pc = i.a
-                
-                elif i.f == OpCode.INT: # Alloc stack
-                    self.sp += i.a
-                
-                elif i.f == OpCode.JMP:
-                    self.pc = i.a
-                
-                elif i.f == OpCode.JPC:
-                    if self.stack[self.sp] == 0:
-                        self.pc = i.a
-                    self.sp -= 1
-                
-                elif i.f == OpCode.WRT:
-                    self.output_buffer.append(str(self.stack[self.sp]))
-                    self.sp -= 1
-                    
-                elif i.f == OpCode.OPR:
-                    if i.a == 0: # Return
-                        if self.bp == 0: break
-                        self.sp = self.bp - 1
-                        self.pc = self.stack[self.sp + 3]
-                        self.bp = self.stack[self.sp + 2]
-                    elif i.a == 2: # +
-                        self.stack[self.sp - 1] += self.stack[self.sp]
-                        self.sp -= 1
-                    elif i.a == 3: # -
-                        self.stack[self.sp - 1] -= self.stack[self.sp]
-                        self.sp -= 1
-                    elif i.a == 4: # *
-                        self.stack[self.sp - 1] *= self.stack[self.sp]
-                        self.sp -= 1
-                    elif i.a == 5: # /
-                        self.stack[self.sp - 1] //= self.stack[self.sp] # 整除
-                        self.sp -= 1
-                    elif i.a == 6: # odd
-                        self.stack[self.sp] = self.stack[self.sp] % 2
-                    elif i.a == 8: # =
-                        self.stack[self.sp - 1] = 1 if self.stack[self.sp - 1] == self.stack[self.sp] else 0
-                        self.sp -= 1
-                    elif i.a == 10: # <
-                        self.stack[self.sp - 1] = 1 if self.stack[self.sp - 1] < self.stack[self.sp] else 0
-                        self.sp -= 1
-                    elif i.a == 12: # >
-                        self.stack[self.sp - 1] = 1 if self.stack[self.sp - 1] > self.stack[self.sp] else 0
-                        self.sp -= 1
-                    # 其他 >=, <= 依此类推
-        except Exception as e:
-            return f"Runtime Error: {e}"
-        
-        return "\n".join(self.output_buffer)
\ No newline at end of file
+            while pc < n:
+                cur = pc
+                pc = cur + 1
+                dispatch[op[cur]](lev[cur], adr[cur])
+        except StopIteration:
+            # 主程序执行 OPR 0 返回，正常结束
+            pass
+        except _RUNTIME_ERRORS as e:
+            return _runtime_error(e)
+        finally:
+            self.pc, self.bp, self.sp = pc, bp, sp
+            self._input_pos = input_pos
+
+        return "\n".join(self.output_buffer)
+
+    def compile_to_python(self):
+        """
+        把加载后的程序翻译成一个 Python 函数，返回与 run() 用法相同的可调用对象。
+        按跳转目标和跳转指令切分基本块，块内每条指令翻译成直接读写 stack 的语句，
+        块之间由 pc 驱动的状态机衔接 (按块首下标二分比较找到对应的块)，执行时不再逐条分派。
+        pc 落在不是块首的位置时 (如返回地址被改写)，交给 run() 从该处继续解释执行；
+        操作数不是 int 的指令不生成代码 (避免把任意文本拼进源码执行)，执行到时同样交给 run()；
+        出错时写回 self.pc 的是出错所在块的块首，而不是出错的那条指令。
+        """
+        op, lev, adr = self.op, self.lev, self.adr
+        n = len(op)
+
+        # 块首：入口、所有跳转目标、每条转移指令的下一条；n 作为正常结束的出口
+        ends_block = {JMP, JPC, CAL, OP_CAL0, OP_OPR0}
+        leaders = {self.pc, n}
+        for pc in range(n):
+            if op[pc] in ends_block:
+                leaders.add(pc + 1)
+            if (op[pc] in JUMP_OPS or op[pc] == OP_CAL0) and type(adr[pc]) is int:
+                leaders.add(adr[pc])
+        leaders = sorted(t for t in leaders if 0 <= t <= n)
+
+        def frame(l):
+            """层差为 l 的栈帧基址表达式"""
+            b = 'bp'
+            for _ in range(l):
+                b = f'stack[{b}]'
+            return b
+
+        def translate(pc):
+            """单条指令 -> 若干行源码，转移指令以 continue/return 结束"""
+            f, l, a = op[pc], lev[pc], adr[pc]
+            if type(l) is not int or type(a) is not int:
+                # 只有 int 操作数才会写入生成的源码，其余交给 run() 解释执行
+                return [f'pc = {pc}', 'return False']
+            if f == LIT:
+                return ['sp += 1', f'stack[sp] = {a}']
+            if f in (LOD, OP_LOD0):
+                return ['sp += 1', f'stack[sp] = stack[{frame(l if f == LOD else 0)} + {a}]']
+            if f in (STO, OP_STO0):
+                return [f'stack[{frame(l if f == STO else 0)} + {a}] = stack[sp]', 'sp -= 1']
+            if f in (CAL, OP_CAL0):
+                return [f'stack[sp + 1] = {frame(l if f == CAL else 0)}',
+                        'stack[sp + 2] = bp', f'stack[sp + 3] = {pc + 1}',
+                        'bp = sp + 1', f'pc = {a}', 'continue']
+            if f == INT:
+                return [f'sp += {a}']
+            if f == JMP:
+                return [f'pc = {a}', 'continue']
+            if f == JPC:
+                return ['c = stack[sp]', 'sp -= 1', 'if c == 0:', f'    pc = {a}', '    continue']
+            if f == RED:
+                return ['if input_pos < len(input_buffer):',
+                        '    value = input_buffer[input_pos]',
+                        '    input_pos += 1',
+                        'else:',
+                        '    value = 0',
+                        f'stack[{frame(l)} + {a}] = int(value)']
+            if f == WRT:
+                return ['output_append(str(stack[sp]))', 'sp -= 1']
+            if f == OP_LOD0_OPR:
+                return [f'y = stack[bp + {a}]', 'stack[sp + 1] = y',
+                        'stack[sp] = ' + BINARY_EXPR[l].format(x='stack[sp]', y='y')]
+            if f == OP_LIT_OPR:
+                return [f'stack[sp + 1] = {a}',
+                        'stack[sp] = ' + BINARY_EXPR[l].format(x='stack[sp]', y=a)]
+            if f == OP_LIT_STO0:
+                return [f'stack[sp + 1] = {l}', f'stack[bp + {a}] = {l}']
+            if f == OPR:  # 未特化的 OPR 都是未定义的子操作
+                return [f'raise VMError({f"未定义的 OPR 操作: {a}"!r})']
+            k = f - OP_OPR0
+            if k == 0:
+                return ['if bp == 0:', '    return True',
+                        'sp = bp - 1', 'pc = stack[sp + 3]', 'bp = stack[sp + 2]', 'continue']
+            if k == 1:
+                return ['stack[sp] = -stack[sp]']
+            if k == 6:
+                return ['stack[sp] = stack[sp] % 2']
+            if 0 <= k < N_OPR and BINARY_EXPR[k] is not None:
+                return ['stack[sp - 1] = ' + BINARY_EXPR[k].format(x='stack[sp - 1]', y='stack[sp]'),
+                        'sp -= 1']
+            if 0 <= k < N_OPR:  # 编号在范围内但未定义的子操作 (7 号)
+                return [f'raise VMError({f"未定义的 OPR 操作: {a}"!r})']
+            # 其余情况 (如非法操作码) 与解释器的行为保持一致，交给 run() 处理
+            return [f'pc = {pc}', 'return False']
+
+        lines = []
+
+        def emit_block(start, end, indent):
+            lines.append(f'{indent}if pc != {start}:')
+            lines.append(f'{indent}    return False')
+            if start == n:
+                lines.append(f'{indent}return True')
+                return
+            for pc in range(start, end):
+                stmts = translate(pc)
+                lines.extend(indent + stmt for stmt in stmts)
+            # 块尾不是无条件转移时，顺序执行到下一块
+            if stmts[-1] not in ('continue', 'return False'):
+                lines.append(f'{indent}pc = {end}')
+                lines.append(f'{indent}continue')
+
+        def emit_tree(lo, hi, indent):
+            # 块首有序，二分比较 pc；左半部分的每个分支都以 continue/return 结束
+            if hi - lo == 1:
+                start = leaders[lo]
+                end = leaders[lo + 1] if lo + 1 < len(leaders) else n
+                emit_block(start, end, indent)
+                return
+            mid = (lo + hi) // 2
+            lines.append(f'{indent}if pc < {leaders[mid]}:')
+            emit_tree(lo, mid, indent + '    ')
+            emit_tree(mid, hi, indent)
+
+        lines.append('def _prog(stack, input_buffer, output_append, state):')
+        lines.append('    pc, bp, sp, input_pos = state')
+        lines.append('    try:')
+        lines.append('        while True:')
+        emit_tree(0, len(leaders), ' ' * 12)
+        lines.append('    finally:')
+        lines.append('        state[:] = pc, bp, sp, input_pos')
+
+        namespace = {'VMError': VMError}
+        exec(compile('\n'.join(lines), '<pl0>', 'exec'), namespace)
+        prog = namespace['_prog']
+
+        def run_compiled():
+            state = [self.pc, self.bp, self.sp, self._input_pos]
+            try:
+                finished = prog(self.stack, self.input_buffer, self.output_buffer.append, state)
+            except _RUNTIME_ERRORS as e:
+                return _runtime_error(e)
+            finally:
+                self.pc, self.bp, self.sp, self._input_pos = state
+            if not finished:
+                return self.run()
+            return "\n".join(self.output_buffer)
+
+        return run_compiled